@@ -1,13 +1,24 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 import json
 import os
+from pathlib import Path
 from packaging.version import parse, InvalidVersion
 from urllib.parse import urljoin, urlparse, unquote
 import logging
-import time
 import sys
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+try:
+    import orjson # Faster JSON encode/decode; stdlib json is used if it is not installed
+except ImportError:
+    orjson = None
 
 # Selenium imports
 from selenium import webdriver
@@ -17,23 +28,58 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
+from selenium.common.exceptions import SessionNotCreatedException
 
 URL_FILE = "urls_to_check.txt"
 TRACKING_FILE = "versions_tracker.json"
 OUTPUT_JSON_FILE = "updates_found.json"
 GITHUB_OUTPUT_FILE = os.getenv('GITHUB_OUTPUT', 'local_github_output.txt')
-
-logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
-
-VERSION_REGEX_PATTERNS = [
-    r'(?<![\w.-])(?:[vV])?(\d+(?:\.\d+){1,3}(?:(?:[-._]?[a-zA-Z0-9]+)+)?)(?![.\w])',
-    r'(?<![\w.-])(?:[vV])?(\d+(?:\.\d+){1,2})(?![.\w])',
-]
-VERSION_PATTERNS_FOR_CLEANING = [
+CHROMEDRIVER_PATH_CACHE_FILE = ".chromedriver_path"
+CHROME_PROFILE_DIR = ".chrome-profile" # Persisted between runs (see workflow cache) to keep Chrome's caches warm
+CHROME_CACHE_DIR = ".chrome-cache"
+PAGE_ETAG_KEY_PREFIX = "__page__::" # Tracker key prefix for the last seen ETag/Last-Modified of each page
+MAX_FETCH_WORKERS = 4 # Parallel page fetches (each worker may own one headless Chrome)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36"
+
+# Only build the parts of the page that are read: the download box (a <section>) and the H1/Title used for the app name
+PAGE_STRAINER = SoupStrainer(['section', 'h1', 'title'])
+DOWNLOAD_LINK_SELECTOR = 'section.downloadbox ul.download-links li.download-link'
+
+# LOG_LEVEL=DEBUG shows per-link details; unknown values fall back to INFO (getLevelName returns an int only for known names)
+LOG_LEVEL = logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper())
+# Pages are processed by several worker threads; the thread name keeps each page's lines identifiable in the log
+logging.basicConfig(level=LOG_LEVEL if isinstance(LOG_LEVEL, int) else logging.INFO, format='[%(levelname)s] [%(threadName)s] %(message)s')
+
+# Strict version pattern; the optional suffix also covers plain "1.2" / "1.2.3" versions
+VERSION_RE = re.compile(r'(?<![\w.-])(?:[vV])?(\d+(?:\.\d+){1,3}(?:(?:[-._]?[a-zA-Z0-9]+)+)?)(?![.\w])')
+# Unanchored fallback, e.g. for versions glued to a name with "_" like "App_PC_2.1.exe"
+VERSION_FALLBACK_RE = re.compile(r'(\d+\.\d+(?:\.\d+){0,2}(?:[.-]?[a-zA-Z0-9]+)*)')
+_VERSION_PATTERNS_FOR_CLEANING_RAW = (
     r'\s*[vV]?\d+(?:\.\d+){1,3}(?:(?:[-._]?[a-zA-Z0-9]+)+)?\b',
     r'\s*[vV]?\d+(?:\.\d+){1,2}\b',
     r'\s+\d+(?:\.\d+)*\b' 
-]
+)
+VERSION_PATTERNS_FOR_CLEANING = [re.compile(pattern, re.IGNORECASE) for pattern in _VERSION_PATTERNS_FOR_CLEANING_RAW]
+# Same patterns anchored to the end of the string (used for display-name cleaning)
+VERSION_PATTERNS_FOR_CLEANING_AT_END = [re.compile(pattern + r'$', re.IGNORECASE) for pattern in _VERSION_PATTERNS_FOR_CLEANING_RAW]
+
+# Precompiled helper patterns (compiled once at import instead of on every call)
+WHITESPACE_RE = re.compile(r'\s+')
+UNDERSCORES_RE = re.compile(r'_+')
+DASH_UNDERSCORE_RE = re.compile(r'[-_]+')
+TRACKING_ID_INVALID_CHARS_RE = re.compile(r'[^a-z0-9-_]')
+# Site tags like "(farsroid.com)"; the bounded [^)] class keeps matching linear instead of backtracking with .*?
+# Callers check `'farsroid' in text.lower()` first so most strings skip the regex entirely.
+FARSROID_TAIL_RE = re.compile(r'\s*\((?:www\.)?farsroid\.com[^)]{0,100}\)\s*$', re.IGNORECASE)
+FARSROID_DASH_TAIL_RE = re.compile(r'\s*[-–—]\s*Farsroid\s*$', re.IGNORECASE)
+FARSROID_SITE_SUFFIX_RE = re.compile(r'\s*\((?:www\.)?farsroid\.com[^)]{0,100}\)\s*', re.IGNORECASE)
+H1_TITLE_CLASS_RE = re.compile(r'title', re.IGNORECASE)
+TITLE_SITE_TAIL_RE = re.compile(r'\s*[-|–—]\s*(?:فارسروید|دانلود.*)$', re.IGNORECASE)
+TITLE_APP_TAIL_RE = re.compile(r'\s*–\s*اپلیکیشن.*$', re.IGNORECASE)
+FILE_EXT_RE = re.compile(r'\.(apk|zip|exe|rar|xapk|apks|msi|dmg|pkg|deb|rpm|appimage|tar\.gz|tgz|tar\.bz2|tbz2|tar\.xz|txz|7z|gz|bz2|xz|jpg|jpeg|png|gif|bmp|tiff|tif|webp|svg|ico|mp3|wav|ogg|aac|flac|m4a|wma|mp4|mkv|avi|mov|wmv|flv|webm|mpeg|mpg|txt|pdf|doc|docx|xls|xlsx|ppt|pptx|odt|ods|odp|rtf|csv|html|htm|xml|json|md|ttf|otf|woff|woff2|eot)$', re.IGNORECASE)
+GENERIC_URL_TERMS_RE = re.compile(r'\b(دانلود|Download|برنامه|App|Apk|Farsroid|Android)\b', re.IGNORECASE)
+LINK_TEXT_NOISE_RE = re.compile(r'\b(?:با لینک مستقیم|مگابایت|\d+)\b', re.IGNORECASE)
 
 COMMON_VARIANT_KEYWORDS_TO_DETECT_AND_CLEAN = [
     "Mod-Extra", "مود اکسترا", "موداکسترا",
@@ -70,50 +116,108 @@ COMMON_VARIANT_KEYWORDS_TO_DETECT_AND_CLEAN = [
     "Font", "فونت"
 ]
 
+# (lowercased keyword, pattern) pairs for aggressively_clean_name_for_tracking, longest first
+AGGRESSIVE_CLEAN_KEYWORD_PATTERNS = [
+    (kw.lower(), re.compile(r'\b' + re.escape(kw) + r'\b', re.IGNORECASE))
+    for kw in sorted(set(COMMON_VARIANT_KEYWORDS_TO_DETECT_AND_CLEAN +
+                         ["PC", "کامپیوتر", "ویندوز", "Windows", "Lite", "لایت", "Pro", "پرو"]), key=len, reverse=True)
+]
+
+VARIANT_KEYWORDS_ORDERED = { 
+    "Mod-Extra": ["mod-extra", "مود اکسترا"], "Mod-Lite": ["mod-lite", "مود لایت"],
+    "Ad-Free": ["ad-free", "بدون تبلیغات"], "Unlocked": ["unlocked", "آنلاک"], "Patched": ["patched", "پچ شده"],
+    "Premium": ["premium", "پرمیوم"], "Ultra": ["ultra", "اولترا"], "Clone": ["clone", "کلون"],
+    "Beta": ["beta", "بتا"], "Full": ["full", "کامل"], "Lite": ["lite", "لایت"], "Main": ["main"],
+    "Pro": ["pro", "پرو"], "VIP": ["vip"], "Plus": ["plus", "پلاس"],
+    "Persian": ["persian", "فارسی"], "English": ["english", "انگلیسی"],
+    "Arm64-v8a": ["arm64-v8a", "arm64"], "Armeabi-v7a": ["armeabi-v7a", "armv7"],
+    "x86_64": ["x86_64"], "x86": ["x86"], "Arm": ["arm"], 
+    "Mod": ["mod", "مود"], 
+    "PC": ["pc", "کامپیوتر"], "Windows": ["windows", "ویندوز"], 
+    "Data": ["data", "obb", "دیتا"]
+}
+DOUBLE_FILE_EXTENSIONS = (".tar.gz", ".tar.bz2", ".tar.xz")
+KNOWN_FILE_EXTENSIONS = frozenset([
+    '.apk', '.zip', '.exe', '.rar', '.xapk', '.apks', '.7z', '.gz', '.bz2', '.xz',
+    '.msi', '.dmg', '.pkg', '.deb', '.rpm', '.appimage',
+    '.tgz', '.tbz2', '.txz', 
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.svg', '.ico',
+    '.mp3', '.wav', '.ogg', '.aac', '.flac', '.m4a', '.wma',
+    '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.mpeg', '.mpg',
+    '.txt', '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', 
+    '.odt', '.ods', '.odp', '.rtf', '.csv', '.html', '.htm', '.xml', '.json', '.md',
+    '.ttf', '.otf', '.woff', '.woff2', '.eot'
+])
+
+VARIANT_KEYWORD_TO_KEY = {pattern: key for key, patterns in VARIANT_KEYWORDS_ORDERED.items() for pattern in patterns}
+# One alternation over all variant keywords, longest first so e.g. "mod-extra" wins over "mod" at the same position.
+# Keywords are lowercase and the scanned text is lowercased once per link, so no IGNORECASE is needed.
+VARIANT_KEYWORDS_RE = re.compile(
+    r'\b(?:' + '|'.join(re.escape(kw) for kw in sorted(VARIANT_KEYWORD_TO_KEY, key=len, reverse=True)) + r')\b')
+
+def load_json_file(path):
+    if orjson:
+        return orjson.loads(Path(path).read_bytes())
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+def dump_json_bytes(data):
+    """Serializes data as UTF-8 JSON indented by 2 spaces (same layout with orjson and stdlib json)."""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+def write_file_bytes(path, data, append=False):
+    """Writes bytes straight to a file descriptor, without a buffered text-mode wrapper."""
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC)
+    fd = os.open(path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view: # os.write may write less than requested
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def save_json_file(path, data):
+    write_file_bytes(path, dump_json_bytes(data))
+
+def write_github_output(updates_count):
+    if os.getenv('GITHUB_OUTPUT'):
+        write_file_bytes(GITHUB_OUTPUT_FILE, f"updates_count={updates_count}\n".encode('utf-8'), append=True)
+
 def load_tracker():
-    if os.path.exists(TRACKING_FILE):
-        try:
-            with open(TRACKING_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                logging.info(f"فایل ردیابی {TRACKING_FILE} با موفقیت بارگذاری شد.")
-                return data
-        except json.JSONDecodeError:
-            logging.warning(f"{TRACKING_FILE} خراب است. با ردیاب خالی شروع می شود.")
-            return {}
-    logging.info(f"فایل ردیابی {TRACKING_FILE} یافت نشد. با ردیاب خالی شروع می شود.")
-    return {}
+    try:
+        data = load_json_file(TRACKING_FILE) # No separate exists() check; a missing file is handled below
+        logging.info(f"فایل ردیابی {TRACKING_FILE} با موفقیت بارگذاری شد.")
+        return data
+    except FileNotFoundError:
+        logging.info(f"فایل ردیابی {TRACKING_FILE} یافت نشد. با ردیاب خالی شروع می شود.")
+        return {}
+    except ValueError: # json.JSONDecodeError and orjson.JSONDecodeError are both ValueError
+        logging.warning(f"{TRACKING_FILE} خراب است. با ردیاب خالی شروع می شود.")
+        return {}
+
+@lru_cache(maxsize=None)
+def parse_version(version_str):
+    """packaging's parse(), memoized; the same tracker versions are compared against every link of a page."""
+    return parse(version_str)
 
 def compare_versions(current_v_str, last_v_str):
-    logging.info(f"مقایسه نسخه ها: فعلی='{current_v_str}', قبلی='{last_v_str}'")
+    """Returns True if current_v_str is newer than last_v_str. Does not log; callers log the result."""
+    if not current_v_str: return False
+    if not last_v_str or last_v_str == "0.0.0": return True
     try:
-        if not current_v_str:
-            logging.warning("نسخه فعلی نامعتبر است (خالی).")
-            return False
-        if not last_v_str or last_v_str == "0.0.0":
-            logging.info(f"نسخه قبلی یافت نشد یا 0.0.0 بود. نسخه فعلی '{current_v_str}' جدید است.")
-            return True
-        try:
-            parsed_current = parse(current_v_str)
-            parsed_last = parse(last_v_str)
-            if parsed_current > parsed_last: return True
-            elif parsed_current < parsed_last: return False
-            else: return current_v_str != last_v_str and current_v_str > last_v_str 
-        except InvalidVersion:
-            logging.warning(f"InvalidVersion ao تجزیه '{current_v_str}' یا '{last_v_str}'. مقایسه رشته ای.")
-            return current_v_str != last_v_str and current_v_str > last_v_str
-        except TypeError: 
-            logging.warning(f"TypeError هنگام مقایسه '{current_v_str}' با '{last_v_str}'. مقایسه رشته ای.")
-            return current_v_str != last_v_str and current_v_str > last_v_str
-    except Exception as e:
-        logging.error(f"خطا در compare_versions ('{current_v_str}' vs '{last_v_str}'): {e}")
+        parsed_current, parsed_last = parse_version(current_v_str), parse_version(last_v_str)
+        if parsed_current != parsed_last: return parsed_current > parsed_last
+        return current_v_str != last_v_str and current_v_str > last_v_str
+    except (InvalidVersion, TypeError): # Not PEP 440 (e.g. "3.0.11-Universal"); fall back to string comparison
         return current_v_str != last_v_str and current_v_str > last_v_str
 
 def sanitize_text_for_tracking_id(text): # Simplified sanitize for tracking ID parts
     if not text: return ""
     text_cleaned = text.strip().lower()
     text_cleaned = text_cleaned.replace('–', '-').replace('—', '-')
-    text_cleaned = re.sub(r'[^a-z0-9-_]', '', text_cleaned) # Keep only alphanumeric, dash, underscore
-    text_cleaned = re.sub(r'[-_]+', '_', text_cleaned) # Consolidate dash/underscore to single underscore
+    text_cleaned = TRACKING_ID_INVALID_CHARS_RE.sub('', text_cleaned) # Keep only alphanumeric, dash, underscore
+    text_cleaned = DASH_UNDERSCORE_RE.sub('_', text_cleaned) # Consolidate dash/underscore to single underscore
     text_cleaned = text_cleaned.strip('_')
     return text_cleaned
 
@@ -123,26 +227,22 @@ def aggressively_clean_name_for_tracking(name_to_clean):
     cleaned_name = name_to_clean
     
     for pattern in VERSION_PATTERNS_FOR_CLEANING:
-        cleaned_name = re.sub(pattern, '', cleaned_name, flags=re.IGNORECASE).strip("-_ ")
-        cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip("-_ ")
+        cleaned_name = pattern.sub('', cleaned_name).strip("-_ ")
+        cleaned_name = WHITESPACE_RE.sub(' ', cleaned_name).strip("-_ ")
 
-    all_keywords_for_aggressive_clean = COMMON_VARIANT_KEYWORDS_TO_DETECT_AND_CLEAN + \
-                                        ["PC", "کامپیوتر", "ویندوز", "Windows", "Lite", "لایت", "Pro", "پرو"] 
-    
-    sorted_keywords = sorted(list(set(all_keywords_for_aggressive_clean)), key=len, reverse=True)
-
-    for kw in sorted_keywords:
-        kw_regex = r'\b' + re.escape(kw) + r'\b'
+    for kw_lower, kw_pattern in AGGRESSIVE_CLEAN_KEYWORD_PATTERNS:
+        if kw_lower not in cleaned_name.lower(): continue # Plain substring check is much cheaper than re.sub
         prev_name = None
         while prev_name != cleaned_name: 
             prev_name = cleaned_name
-            cleaned_name = re.sub(kw_regex, '', cleaned_name, flags=re.IGNORECASE).strip("-_ ")
-            cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip("-_ ")
+            cleaned_name = kw_pattern.sub('', cleaned_name).strip("-_ ")
+            cleaned_name = WHITESPACE_RE.sub(' ', cleaned_name).strip("-_ ")
 
-    cleaned_name = re.sub(r'\s*\((?:www\.)?farsroid\.com.*?\)\s*$', '', cleaned_name, flags=re.IGNORECASE).strip()
-    cleaned_name = re.sub(r'\s*[-–—]\s*Farsroid\s*$', '', cleaned_name, flags=re.IGNORECASE).strip()
+    if 'farsroid' in cleaned_name.lower():
+        cleaned_name = FARSROID_TAIL_RE.sub('', cleaned_name).strip()
+        cleaned_name = FARSROID_DASH_TAIL_RE.sub('', cleaned_name).strip()
     cleaned_name = cleaned_name.strip(' -–—') 
-    cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip()
+    cleaned_name = WHITESPACE_RE.sub(' ', cleaned_name).strip()
     if not cleaned_name: 
         name_parts = name_to_clean.split()
         if name_parts: cleaned_name = name_parts[0] 
@@ -152,7 +252,7 @@ def aggressively_clean_name_for_tracking(name_to_clean):
 def extract_app_name_from_page(soup, page_url):
     """Extracts app name from H1/Title, performs light cleaning (versions at end, site tags)."""
     app_name_candidate = None
-    h1_tag = soup.find('h1', class_=re.compile(r'title', re.IGNORECASE))
+    h1_tag = soup.find('h1', class_=H1_TITLE_CLASS_RE)
     if h1_tag and h1_tag.text.strip():
         app_name_candidate = h1_tag.text.strip()
     
@@ -160,8 +260,8 @@ def extract_app_name_from_page(soup, page_url):
         title_tag = soup.find('title')
         if title_tag and title_tag.text.strip():
             app_name_candidate = title_tag.text.strip()
-            app_name_candidate = re.sub(r'\s*[-|–—]\s*(?:فارسروید|دانلود.*)$', '', app_name_candidate, flags=re.IGNORECASE).strip()
-            app_name_candidate = re.sub(r'\s*–\s*اپلیکیشن.*$', '', app_name_candidate, flags=re.IGNORECASE).strip()
+            app_name_candidate = TITLE_SITE_TAIL_RE.sub('', app_name_candidate).strip()
+            app_name_candidate = TITLE_APP_TAIL_RE.sub('', app_name_candidate).strip()
 
     if app_name_candidate:
         original_name = app_name_candidate 
@@ -171,12 +271,13 @@ def extract_app_name_from_page(soup, page_url):
         page_name_for_display = app_name_candidate # Keep it richer for display
         
         # Lightly clean for display (remove Farsroid tags, maybe trailing versions)
-        page_name_for_display = re.sub(r'\s*\((?:www\.)?farsroid\.com.*?\)\s*$', '', page_name_for_display, flags=re.IGNORECASE).strip()
-        for pattern in VERSION_PATTERNS_FOR_CLEANING: # Remove versions if they are at the very end
-            page_name_for_display = re.sub(pattern + r'$', '', page_name_for_display, flags=re.IGNORECASE).strip("-_ ")
+        if 'farsroid' in page_name_for_display.lower():
+            page_name_for_display = FARSROID_TAIL_RE.sub('', page_name_for_display).strip()
+        for pattern in VERSION_PATTERNS_FOR_CLEANING_AT_END: # Remove versions if they are at the very end
+            page_name_for_display = pattern.sub('', page_name_for_display).strip("-_ ")
 
         page_name_for_display = page_name_for_display.strip(' -–—')
-        page_name_for_display = re.sub(r'\s+', ' ', page_name_for_display).strip()
+        page_name_for_display = WHITESPACE_RE.sub(' ', page_name_for_display).strip()
 
 
         if page_name_for_display:
@@ -190,17 +291,15 @@ def extract_app_name_from_page(soup, page_url):
     if path_parts:
         guessed_name = path_parts[-1]
         # Remove extension
-        known_extensions_regex = r'\.(apk|zip|exe|rar|xapk|apks|msi|dmg|pkg|deb|rpm|appimage|tar\.gz|tgz|tar\.bz2|tbz2|tar\.xz|txz|7z|gz|bz2|xz|jpg|jpeg|png|gif|bmp|tiff|tif|webp|svg|ico|mp3|wav|ogg|aac|flac|m4a|wma|mp4|mkv|avi|mov|wmv|flv|webm|mpeg|mpg|txt|pdf|doc|docx|xls|xlsx|ppt|pptx|odt|ods|odp|rtf|csv|html|htm|xml|json|md|ttf|otf|woff|woff2|eot)$'
-        guessed_name = re.sub(known_extensions_regex, '', guessed_name, flags=re.IGNORECASE)
+        guessed_name = FILE_EXT_RE.sub('', guessed_name)
         # Remove versions
         for pattern in VERSION_PATTERNS_FOR_CLEANING:
-            guessed_name = re.sub(pattern, '', guessed_name, flags=re.IGNORECASE).strip("-_ ")
+            guessed_name = pattern.sub('', guessed_name).strip("-_ ")
         # Remove only very generic URL terms
-        generic_url_terms = r'\b(دانلود|Download|برنامه|App|Apk|Farsroid|Android)\b'
-        guessed_name = re.sub(generic_url_terms, '', guessed_name, flags=re.IGNORECASE).strip("-_ ")
+        guessed_name = GENERIC_URL_TERMS_RE.sub('', guessed_name).strip("-_ ")
         # Capitalize and join
-        guessed_name = ' '.join(word.capitalize() for word in re.split(r'[-_]+', guessed_name) if word)
-        guessed_name = re.sub(r'\s+', ' ', guessed_name).strip()
+        guessed_name = ' '.join(word.capitalize() for word in DASH_UNDERSCORE_RE.split(guessed_name) if word)
+        guessed_name = WHITESPACE_RE.sub(' ', guessed_name).strip()
         if guessed_name:
             logging.info(f"نام حدس زده شده از URL (پاکسازی شده): {guessed_name}")
             return guessed_name
@@ -209,95 +308,233 @@ def extract_app_name_from_page(soup, page_url):
     return "UnknownApp"
 
 
-def get_page_source_with_selenium(url, wait_time=20, wait_for_class="downloadbox"):
-    # Note: The URL cleaning is now done in main() before this function is called.
-    # So, the 'url' parameter here is expected to be already cleaned.
-    logging.info(f"در حال دریافت {url} با Selenium...")
-    chrome_options = ChromeOptions()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu") 
-    chrome_options.add_argument("--window-size=1920,1080") 
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36")
-    driver = None
+def create_http_session():
+    """Creates the requests session shared by all HEAD/static fetches so connections are kept alive and reused."""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    adapter = HTTPAdapter(pool_connections=MAX_FETCH_WORKERS * 2, pool_maxsize=MAX_FETCH_WORKERS * 2, max_retries=3)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def try_static(url, session, wait_for_class="downloadbox", timeout=15):
+    """Fetches the page with plain requests; returns None if the download box is clearly not in the static HTML.
+
+    The byte check is only a cheap pre-filter; PageFetcher.get still parses the result before trusting it.
+    """
+    logging.info(f"در حال دریافت {url} با requests...")
+    try:
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.warning(f"خطا در دریافت {url} با requests: {e}")
+        return None
+    if wait_for_class.encode() not in response.content or b'download-btn' not in response.content:
+        logging.info(f"بخش {wait_for_class} در HTML ایستا یافت نشد. استفاده از Selenium برای {url}")
+        return None
+    logging.info(f"موفقیت در دریافت سورس صفحه با requests برای {url}")
+    return response.content
+
+
+def get_page_etag(url, session, timeout=10):
+    """Returns the page's strong ETag from a HEAD request, or None.
+
+    Weak ETags and Last-Modified are ignored: dynamic pages often regenerate them per request, which would
+    never allow a skip and would rewrite the tracker on every run.
+    """
     try:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.warning(f"خطا در درخواست HEAD برای {url}: {e}")
+        return None
+    etag = response.headers.get('ETag')
+    if not etag or etag.startswith('W/'):
+        return None
+    return etag
+
+
+_DRIVER_INSTALL_LOCK = threading.Lock()
+_CHROMEDRIVER_PATH = None
+
+
+def get_chromedriver_path(force_install=False):
+    """Returns the ChromeDriver path, calling ChromeDriverManager().install() only when no cached path exists."""
+    global _CHROMEDRIVER_PATH
+    with _DRIVER_INSTALL_LOCK: # Workers must not download/unpack the driver concurrently
+        if not force_install:
+            if _CHROMEDRIVER_PATH and os.path.exists(_CHROMEDRIVER_PATH):
+                return _CHROMEDRIVER_PATH
+            if os.path.exists(CHROMEDRIVER_PATH_CACHE_FILE):
+                with open(CHROMEDRIVER_PATH_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    cached_path = f.read().strip()
+                if cached_path and os.path.exists(cached_path):
+                    logging.info(f"استفاده از مسیر ChromeDriver ذخیره شده: {cached_path}")
+                    _CHROMEDRIVER_PATH = cached_path
+                    return cached_path
+        driver_path = ChromeDriverManager().install()
+        _CHROMEDRIVER_PATH = driver_path
         try:
-            driver_path = ChromeDriverManager().install()
-            service = ChromeService(executable_path=driver_path)
+            with open(CHROMEDRIVER_PATH_CACHE_FILE, 'w', encoding='utf-8') as f:
+                f.write(driver_path)
+        except OSError as e:
+            logging.warning(f"خطا در ذخیره مسیر ChromeDriver در {CHROMEDRIVER_PATH_CACHE_FILE}: {e}")
+        return driver_path
+
+
+class PageFetcher:
+    """Fetches page sources, trying a static request first and falling back to a shared headless Chrome session."""
+
+    def __init__(self, session, wait_time=20, wait_for_class="downloadbox", profile_name="default"):
+        self.session = session
+        self.wait_time = wait_time
+        self.wait_for_class = wait_for_class
+        # Chrome locks its user-data-dir, so every concurrently running fetcher needs its own profile
+        self.profile_dir = os.path.abspath(os.path.join(CHROME_PROFILE_DIR, profile_name))
+        self.cache_dir = os.path.abspath(os.path.join(CHROME_CACHE_DIR, profile_name))
+        self.driver = None
+
+    def _get_driver(self):
+        """Lazily starts the Chrome session on first use and reuses it afterwards."""
+        if self.driver:
+            return self.driver
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu") 
+        chrome_options.add_argument("--window-size=1920,1080") 
+        chrome_options.add_argument(f"user-agent={USER_AGENT}")
+        chrome_options.add_argument(f"--user-data-dir={self.profile_dir}")
+        chrome_options.add_argument(f"--disk-cache-dir={self.cache_dir}")
+        for lock_name in ("SingletonLock", "SingletonSocket", "SingletonCookie"):
+            # Stale locks from a previous (e.g. restored from CI cache) run would make Chrome refuse the profile
+            lock_path = os.path.join(self.profile_dir, lock_name)
+            if os.path.lexists(lock_path):
+                os.remove(lock_path)
+        # Only the HTML is scraped, so skip downloading images and other heavy resources
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.plugins": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+        })
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.page_load_strategy = 'eager' # Return at DOMContentLoaded; the download links are waited for explicitly
+        try:
+            service = ChromeService(executable_path=get_chromedriver_path())
         except Exception as e_driver_manager:
             logging.warning(f"خطا در ChromeDriverManager: {e_driver_manager}. استفاده از درایور پیشفرض.")
             service = ChromeService() # Fallback to default service if manager fails
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.get(url) # The URL passed here should be clean
-        WebDriverWait(driver, wait_time).until(EC.presence_of_element_located((By.CLASS_NAME, wait_for_class)))
-        time.sleep(5) 
-        page_source = driver.page_source
-        logging.info(f"موفقیت در دریافت سورس صفحه با Selenium برای {url}")
-        return page_source
-    except Exception as e:
-        logging.error(f"خطای Selenium برای {url}: {e}", exc_info=True)
-        if driver: 
-            try: return driver.page_source # Try to get source even on error if driver exists
-            except: pass
-        return None
-    finally:
-        if driver:
-            driver.quit()
+        try:
+            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        except SessionNotCreatedException as e:
+            # Same exception is raised for e.g. a locked profile or a Chrome crash; only a version mismatch is fixed by reinstalling
+            if "only supports Chrome version" not in str(e):
+                raise
+            # A cached driver no longer matches the installed Chrome; install a fresh one and retry once
+            logging.warning(f"ChromeDriver با Chrome سازگار نیست: {e}. نصب مجدد ChromeDriver...")
+            service = ChromeService(executable_path=get_chromedriver_path(force_install=True))
+            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        return self.driver
+
+    def get_with_selenium(self, url):
+        # Note: The URL cleaning is done in main() before this method is called.
+        # So, the 'url' parameter here is expected to be already cleaned.
+        logging.info(f"در حال دریافت {url} با Selenium...")
+        driver = None
+        try:
+            driver = self._get_driver()
+            driver.get(url) # The URL passed here should be clean
+            # Wait for the download buttons themselves instead of sleeping a fixed time for JS to finish
+            download_btn_selector = f"section.{self.wait_for_class} ul.download-links li.download-link a.download-btn"
+            # No readyState gate: with the 'eager' page load strategy the buttons being present is all we need
+            WebDriverWait(driver, self.wait_time).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, download_btn_selector)))
+            page_source = driver.page_source
+            logging.info(f"موفقیت در دریافت سورس صفحه با Selenium برای {url}")
+            return page_source
+        except Exception as e:
+            logging.error(f"خطای Selenium برای {url}: {e}", exc_info=True)
+            if driver: 
+                try: return driver.page_source # Try to get source even on error if driver exists
+                except Exception:
+                    self.close() # Session is unusable; a new one is started for the next URL
+            return None
+
+    def get(self, url):
+        """Returns (parsed soup or None, True if the static HTML was used instead of Selenium)."""
+        page_source = try_static(url, self.session, wait_for_class=self.wait_for_class)
+        if page_source:
+            soup = BeautifulSoup(page_source, 'lxml', parse_only=PAGE_STRAINER)
+            # The class names may only appear in inline CSS/JS while the links themselves are rendered by JS
+            if has_download_links(soup):
+                return soup, True
+            logging.info(f"لینک دانلود در HTML ایستا یافت نشد. استفاده از Selenium برای {url}")
+        page_source = self.get_with_selenium(url)
+        if not page_source:
+            return None, False
+        return BeautifulSoup(page_source, 'lxml', parse_only=PAGE_STRAINER), False
+
+    def close(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.warning(f"خطا در بستن Chrome: {e}")
+            self.driver = None
+
+
+class WorkerPool:
+    """Hands out PageFetcher instances to worker threads so each browser session is used by one thread at a time."""
+
+    def __init__(self, size, session, wait_for_class="downloadbox"):
+        self.session = session
+        self.fetchers = [PageFetcher(session, wait_for_class=wait_for_class, profile_name=f"worker-{i}") for i in range(size)]
+        self._idle_fetchers = queue.Queue()
+        for fetcher in self.fetchers:
+            self._idle_fetchers.put(fetcher)
+
+    def get(self, url):
+        fetcher = self._idle_fetchers.get()
+        try:
+            return fetcher.get(url)
+        finally:
+            self._idle_fetchers.put(fetcher)
+
+    def close(self):
+        for fetcher in self.fetchers:
+            fetcher.close()
 
 
 def extract_version_from_text_or_url(text_content, url_content):
-    if text_content:
-        for pattern in VERSION_REGEX_PATTERNS:
-            match = re.search(pattern, text_content)
+    sources = [source for source in (text_content, url_content) if source]
+    # Link text is preferred over the URL; the fallback pattern is only tried if the strict one fails on both
+    for pattern in (VERSION_RE, VERSION_FALLBACK_RE):
+        for source in sources:
+            match = pattern.search(source)
             if match: return match.group(1).strip("-_ ")
-    if url_content:
-        for pattern in VERSION_REGEX_PATTERNS:
-            match = re.search(pattern, url_content) 
-            if match: return match.group(1).strip("-_ ")
-    # Fallback pattern if more specific ones fail
-    fallback_pattern = r'(\d+\.\d+(?:\.\d+){0,2}(?:[.-]?[a-zA-Z0-9]+)*)' 
-    if text_content:
-        match = re.search(fallback_pattern, text_content)
-        if match: return match.group(1).strip("-_ ")
-    if url_content:
-        match = re.search(fallback_pattern, url_content)
-        if match: return match.group(1).strip("-_ ")
     return None
 
-def get_file_extension_from_url(download_url, combined_text_for_variant):
+def get_file_extension_from_url(download_url, combined_text_for_variant_lower):
+    """combined_text_for_variant_lower must already be lowercased (scrape_farsroid_page lowercases it once per link)."""
     parsed_url_path = urlparse(download_url).path
-    raw_filename_from_url = os.path.basename(parsed_url_path)
+    raw_filename_lower = os.path.basename(parsed_url_path).lower()
     
-    double_extensions = [".tar.gz", ".tar.bz2", ".tar.xz"]
-    for de in double_extensions:
-        if raw_filename_from_url.lower().endswith(de): return de
+    if raw_filename_lower.endswith(DOUBLE_FILE_EXTENSIONS):
+        return next(de for de in DOUBLE_FILE_EXTENSIONS if raw_filename_lower.endswith(de))
 
-    _, ext_from_url = os.path.splitext(raw_filename_from_url)
-    
-    known_extensions = [
-        '.apk', '.zip', '.exe', '.rar', '.xapk', '.apks', '.7z', '.gz', '.bz2', '.xz',
-        '.msi', '.dmg', '.pkg', '.deb', '.rpm', '.appimage',
-        '.tgz', '.tbz2', '.txz', 
-        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.svg', '.ico',
-        '.mp3', '.wav', '.ogg', '.aac', '.flac', '.m4a', '.wma',
-        '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.mpeg', '.mpg',
-        '.txt', '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', 
-        '.odt', '.ods', '.odp', '.rtf', '.csv', '.html', '.htm', '.xml', '.json', '.md',
-        '.ttf', '.otf', '.woff', '.woff2', '.eot'
-    ]
+    _, ext_from_url = os.path.splitext(raw_filename_lower)
     
-    if ext_from_url and ext_from_url.lower() in known_extensions:
-        return ext_from_url.lower()
+    if ext_from_url in KNOWN_FILE_EXTENSIONS:
+        return ext_from_url
     else:
         # Guess based on variant text if primary extension detection fails
-        combined_text_for_variant_lower = combined_text_for_variant.lower()
         if "windows" in combined_text_for_variant_lower or "pc" in combined_text_for_variant_lower : return ".exe" 
         if "macos" in combined_text_for_variant_lower or "mac" in combined_text_for_variant_lower: return ".dmg"
         if "linux" in combined_text_for_variant_lower : return ".appimage" 
         if "data" in combined_text_for_variant_lower or "obb" in combined_text_for_variant_lower : return ".zip" 
         if "font" in combined_text_for_variant_lower: return ".zip" 
-        if ext_from_url: return ext_from_url.lower() # Return original if still unknown but present
+        if ext_from_url: return ext_from_url # Return original if still unknown but present
         return ".bin" # Default fallback
 
 
@@ -312,24 +549,22 @@ def scrape_farsroid_page(page_url, soup, tracker_data):
     if not base_app_name_for_tracking_id: base_app_name_for_tracking_id = "UnknownApp" 
     logging.info(f"  نام پایه برای شناسه ردیابی: '{base_app_name_for_tracking_id}'")
 
-    download_box = soup.find('section', class_='downloadbox')
-    if not download_box: return updates_found_on_page
-    download_links_ul = download_box.find('ul', class_='download-links')
-    if not download_links_ul: return updates_found_on_page
-    found_lis = download_links_ul.find_all('li', class_='download-link')
+    found_lis = soup.select(DOWNLOAD_LINK_SELECTOR)
     if not found_lis: return updates_found_on_page
 
     logging.info(f"تعداد {len(found_lis)} آیتم li.download-link پیدا شد.")
 
+    # Per-link details are DEBUG-only; the check is done once so the f-strings below are not built when DEBUG is off
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
     for i, li in enumerate(found_lis):
-        logging.info(f"--- پردازش li شماره {i+1} ---")
+        if debug_enabled: logging.debug(f"--- پردازش li شماره {i+1} ---")
         link_tag = li.find('a', class_='download-btn')
         if not link_tag or not link_tag.get('href'): continue
 
         download_url = urljoin(page_url, link_tag['href'])
         link_text_span = link_tag.find('span', class_='txt')
         link_text = link_text_span.text.strip() if link_text_span else ""
-        logging.info(f"  URL: {download_url}, متن لینک: {link_text}")
+        if debug_enabled: logging.debug(f"  URL: {download_url}, متن لینک: {link_text}")
 
         filename_from_url_decoded = unquote(urlparse(download_url).path.split('/')[-1])
         current_version = extract_version_from_text_or_url(link_text, filename_from_url_decoded)
@@ -337,39 +572,24 @@ def scrape_farsroid_page(page_url, soup, tracker_data):
         if not current_version:
             logging.warning(f"  نسخه استخراج نشد.")
             continue
-        logging.info(f"  نسخه: {current_version}")
+        if debug_enabled: logging.debug(f"  نسخه: {current_version}")
 
         # --- تشخیص نوع (Variant) فقط از لینک دانلود ---
         link_only_variant_parts = []
         # Prepare a combined text from link and filename for robust variant detection
-        combined_text_for_link_variant_detection = (filename_from_url_decoded.lower() + " " + link_text.lower()).replace('(farsroid.com)', '').replace('دانلود فایل نصبی', '').replace('برنامه با لینک مستقیم', '').strip()
-        combined_text_for_link_variant_detection = re.sub(r'\b(?:با لینک مستقیم|مگابایت|\d+)\b', '', combined_text_for_link_variant_detection, flags=re.IGNORECASE).strip()
-        
-        variant_keywords_ordered = { 
-            "Mod-Extra": ["mod-extra", "مود اکسترا"], "Mod-Lite": ["mod-lite", "مود لایت"],
-            "Ad-Free": ["ad-free", "بدون تبلیغات"], "Unlocked": ["unlocked", "آنلاک"], "Patched": ["patched", "پچ شده"],
-            "Premium": ["premium", "پرمیوم"], "Ultra": ["ultra", "اولترا"], "Clone": ["clone", "کلون"],
-            "Beta": ["beta", "بتا"], "Full": ["full", "کامل"], "Lite": ["lite", "لایت"], "Main": ["main"],
-            "Pro": ["pro", "پرو"], "VIP": ["vip"], "Plus": ["plus", "پلاس"],
-            "Persian": ["persian", "فارسی"], "English": ["english", "انگلیسی"],
-            "Arm64-v8a": ["arm64-v8a", "arm64"], "Armeabi-v7a": ["armeabi-v7a", "armv7"],
-            "x86_64": ["x86_64"], "x86": ["x86"], "Arm": ["arm"], 
-            "Mod": ["mod", "مود"], 
-            "PC": ["pc", "کامپیوتر"], "Windows": ["windows", "ویندوز"], 
-            "Data": ["data", "obb", "دیتا"]
-        }
+        combined_text_for_link_variant_detection = f"{filename_from_url_decoded} {link_text}".lower().replace('(farsroid.com)', '').replace('دانلود فایل نصبی', '').replace('برنامه با لینک مستقیم', '').strip()
+        combined_text_for_link_variant_detection = LINK_TEXT_NOISE_RE.sub('', combined_text_for_link_variant_detection).strip()
         
-        temp_combined_text = combined_text_for_link_variant_detection
-        for key, patterns in variant_keywords_ordered.items():
-            for pattern in patterns:
-                if re.search(r'\b' + re.escape(pattern) + r'\b', temp_combined_text, flags=re.IGNORECASE):
-                    if key == "Mod" and any(k in link_only_variant_parts for k in ["Mod-Extra", "Mod-Lite"]): continue
-                    if key == "Lite" and "Mod-Lite" in link_only_variant_parts: continue
-                    if key not in link_only_variant_parts: link_only_variant_parts.append(key)
-                    break 
+        matched_variant_keys = {VARIANT_KEYWORD_TO_KEY[match.group(0)]
+                                for match in VARIANT_KEYWORDS_RE.finditer(combined_text_for_link_variant_detection)}
+        for key in VARIANT_KEYWORDS_ORDERED:
+            if key not in matched_variant_keys: continue
+            if key == "Mod" and any(k in link_only_variant_parts for k in ["Mod-Extra", "Mod-Lite"]): continue
+            if key == "Lite" and "Mod-Lite" in link_only_variant_parts: continue
+            link_only_variant_parts.append(key)
         
         file_extension = get_file_extension_from_url(download_url, combined_text_for_link_variant_detection)
-        logging.info(f"  پسوند فایل: {file_extension}")
+        if debug_enabled: logging.debug(f"  پسوند فایل: {file_extension}")
         
         if file_extension == ".exe":
             if "PC" in link_only_variant_parts:
@@ -388,12 +608,12 @@ def scrape_farsroid_page(page_url, soup, tracker_data):
             # Add more defaults based on extension if needed
             else: variant_final_for_display_tracking = "Default" # Fallback for JSON/tracking
         
-        logging.info(f"  نوع نهایی برای نمایش/ردیابی: '{variant_final_for_display_tracking}'")
+        if debug_enabled: logging.debug(f"  نوع نهایی برای نمایش/ردیابی: '{variant_final_for_display_tracking}'")
 
         tracking_id_app_part = sanitize_text_for_tracking_id(base_app_name_for_tracking_id)
         tracking_id_variant_part = sanitize_text_for_tracking_id(variant_final_for_display_tracking)
         tracking_id = f"{tracking_id_app_part}_{tracking_id_variant_part}".lower()
-        tracking_id = re.sub(r'_+', '_', tracking_id).strip('_')
+        tracking_id = UNDERSCORES_RE.sub('_', tracking_id).strip('_')
         # Refine tracking_id: remove generic suffixes if not an APK or if they are redundant
         if tracking_id.endswith(("_default", "_archive", "_image", "_audio", "_video", "_document", "_font")) and file_extension != ".apk":
             tracking_id = tracking_id.rsplit('_', 1)[0]
@@ -407,20 +627,23 @@ def scrape_farsroid_page(page_url, soup, tracker_data):
         elif not tracking_id_app_part and not tracking_id_variant_part:
             tracking_id = "unknown_app_variant" # Absolute fallback
 
-        logging.info(f"  شناسه ردیابی: {tracking_id}")
+        if debug_enabled: logging.debug(f"  شناسه ردیابی: {tracking_id}")
         
         # --- ساخت نام فایل پیشنهادی (رویکرد جدید و ساده‌تر) ---
         suggested_filename = filename_from_url_decoded
         # فقط پسوند سایت را حذف کن
-        site_suffix_pattern = r'\s*\((?:www\.)?farsroid\.com.*?\)\s*'
-        suggested_filename = re.sub(site_suffix_pattern, '', suggested_filename, flags=re.IGNORECASE).strip()
+        if 'farsroid' in suggested_filename.lower():
+            suggested_filename = FARSROID_SITE_SUFFIX_RE.sub('', suggested_filename)
+        suggested_filename = suggested_filename.strip()
         # اطمینان از اینکه پسوند فایل حفظ شده
         if not os.path.splitext(suggested_filename)[1]: # اگر پسوند ندارد
             base_name_no_ext = os.path.splitext(filename_from_url_decoded)[0]
-            base_name_no_ext_cleaned = re.sub(site_suffix_pattern, '', base_name_no_ext, flags=re.IGNORECASE).strip()
+            if 'farsroid' in base_name_no_ext.lower():
+                base_name_no_ext = FARSROID_SITE_SUFFIX_RE.sub('', base_name_no_ext)
+            base_name_no_ext_cleaned = base_name_no_ext.strip()
             suggested_filename = base_name_no_ext_cleaned + file_extension
 
-        logging.info(f"  نام فایل پیشنهادی (ساده شده): {suggested_filename}")
+        if debug_enabled: logging.debug(f"  نام فایل پیشنهادی (ساده شده): {suggested_filename}")
         
         last_known_version = tracker_data.get(tracking_id, "0.0.0")
         if compare_versions(current_version, last_known_version):
@@ -436,20 +659,60 @@ def scrape_farsroid_page(page_url, soup, tracker_data):
                 "current_version_for_tracking": current_version # Store the version used for comparison
             })
         else:
-            logging.info(f"    => {tracking_id} به‌روز است (فعلی: {current_version}, قبلی: {last_known_version}).")
+            if debug_enabled: logging.debug(f"    => {tracking_id} به‌روز است (فعلی: {current_version}, قبلی: {last_known_version}).")
     return updates_found_on_page
 
+def has_download_links(soup):
+    """True if the parsed page contains at least one usable download button (not e.g. a challenge or half-loaded page)."""
+    return soup.select_one(DOWNLOAD_LINK_SELECTOR + ' a.download-btn[href]') is not None
+
+def process_url(page_url, fetcher, tracker_data):
+    """Fetches and scrapes a single page.
+
+    Returns (updates found on the page, page ETag to remember). The ETag only describes the static HTML,
+    so it is None unless the static HTML itself contained the download links and the page was scraped;
+    pages that needed Selenium (links rendered by JS) or failed are always fetched again next run.
+    """
+    logging.info(f"--- شروع بررسی URL: {page_url} ---")
+    updates_on_page = []
+    page_etag = get_page_etag(page_url, fetcher.session)
+    if page_etag and tracker_data.get(PAGE_ETAG_KEY_PREFIX + page_url) == page_etag:
+        logging.info(f"صفحه {page_url} از آخرین بررسی تغییر نکرده است (ETag: {page_etag}). رد شدن...")
+        return updates_on_page, page_etag
+    # Pass the cleaned page_url to the fetcher; the page comes back already parsed
+    soup, via_static = fetcher.get(page_url)
+    
+    if soup is None:
+        logging.error(f"محتوای صفحه برای {page_url} دریافت نشد. رد شدن...")
+        return updates_on_page, None
+    if not via_static:
+        page_etag = None # Links came from JS/XHR, which the document ETag does not cover
+    try:
+        if not via_static and not has_download_links(soup): # The static path already checked for links
+            logging.warning(f"هیچ لینک دانلودی در صفحه {page_url} یافت نشد (صفحه ناقص یا چالش؟). در اجرای بعدی دوباره بررسی می شود.")
+            page_etag = None
+        # Assuming only farsroid.com URLs are processed this way for now
+        if "farsroid.com" in page_url.lower(): 
+            updates_on_page = scrape_farsroid_page(page_url, soup, tracker_data)
+        else:
+            logging.warning(f"خراش دهنده برای {page_url} پیاده سازی نشده است.")
+            page_etag = None
+    except Exception as e:
+        logging.error(f"خطا هنگام پردازش محتوای دریافت شده برای {page_url}: {e}", exc_info=True)
+        page_etag = None # Make sure the page is scraped again next run
+    logging.info(f"--- پایان بررسی URL: {page_url} ---")
+    return updates_on_page, page_etag
+
 def main():
-    if not os.path.exists(URL_FILE):
+    url_file_path = Path(URL_FILE)
+    if not url_file_path.is_file():
         logging.error(f"فایل URL ها یافت نشد: {URL_FILE}")
-        with open(OUTPUT_JSON_FILE, 'w', encoding='utf-8') as f: json.dump([], f)
-        if os.getenv('GITHUB_OUTPUT'):
-            with open(GITHUB_OUTPUT_FILE, 'a', encoding='utf-8') as gh_output: gh_output.write(f"updates_count=0\n")
+        save_json_file(OUTPUT_JSON_FILE, [])
+        write_github_output(0)
         sys.exit(1) 
 
-    raw_urls_from_file = []
-    with open(URL_FILE, 'r', encoding='utf-8') as f:
-        raw_urls_from_file = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    raw_urls_from_file = [line.strip() for line in url_file_path.read_text(encoding='utf-8').splitlines()
+                          if line.strip() and not line.startswith('#')]
 
     urls_to_process = []
     for raw_url in raw_urls_from_file:
@@ -462,52 +725,54 @@ def main():
 
     if not urls_to_process:
         logging.info("فایل URL ها خالی است یا فقط شامل کامنت است.")
-        with open(OUTPUT_JSON_FILE, 'w', encoding='utf-8') as f: json.dump([], f)
-        if os.getenv('GITHUB_OUTPUT'):
-            with open(GITHUB_OUTPUT_FILE, 'a', encoding='utf-8') as gh_output: gh_output.write(f"updates_count=0\n")
+        save_json_file(OUTPUT_JSON_FILE, [])
+        write_github_output(0)
         return
 
+    # Process URLs of the same host back to back (in first-seen order) so connection and browser caches stay warm
+    urls_by_host = defaultdict(list)
+    for page_url in urls_to_process:
+        urls_by_host[urlparse(page_url).netloc].append(page_url)
+    urls_to_process = [page_url for host_urls in urls_by_host.values() for page_url in host_urls]
+
     tracker_data = load_tracker()
     all_updates_found = []
+    page_etags = {}
     
-    for page_url in urls_to_process: # page_url is now the cleaned version
-        logging.info(f"\n--- شروع بررسی URL: {page_url} ---")
-        # Pass the cleaned page_url to Selenium function
-        page_content = get_page_source_with_selenium(page_url, wait_for_class="downloadbox") 
-        
-        if not page_content:
-            logging.error(f"محتوای صفحه برای {page_url} با Selenium دریافت نشد. رد شدن...")
-            continue
-        try:
-            soup = BeautifulSoup(page_content, 'html.parser')
-            # Assuming only farsroid.com URLs are processed this way for now
-            if "farsroid.com" in page_url.lower(): 
-                updates_on_page = scrape_farsroid_page(page_url, soup, tracker_data)
+    num_workers = max(1, min(MAX_FETCH_WORKERS, len(urls_to_process)))
+    session = create_http_session() # One keep-alive connection pool for all HEAD/static requests
+    pool = WorkerPool(num_workers, session, wait_for_class="downloadbox")
+    try:
+        with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="worker") as executor:
+            # tracker_data is only read while scraping; results are merged in URL order below
+            futures = [executor.submit(process_url, page_url, pool, tracker_data) for page_url in urls_to_process]
+            for page_url, future in zip(urls_to_process, futures):
+                updates_on_page, page_etag = future.result()
                 all_updates_found.extend(updates_on_page)
-            else:
-                logging.warning(f"خراش دهنده برای {page_url} پیاده سازی نشده است.")
-        except Exception as e:
-            logging.error(f"خطا هنگام پردازش محتوای دریافت شده از Selenium برای {page_url}: {e}", exc_info=True)
-        logging.info(f"--- پایان بررسی URL: {page_url} ---")
+                page_etags[PAGE_ETAG_KEY_PREFIX + page_url] = page_etag
+    finally:
+        pool.close()
+        session.close()
 
     new_tracker_data_for_save = tracker_data.copy()
     for update_item in all_updates_found:
         new_tracker_data_for_save[update_item["tracking_id"]] = update_item["current_version_for_tracking"]
+    for page_etag_key, page_etag in page_etags.items():
+        if page_etag:
+            new_tracker_data_for_save[page_etag_key] = page_etag
+        else:
+            new_tracker_data_for_save.pop(page_etag_key, None) # Never skip a page based on an outdated ETag
 
-    with open(OUTPUT_JSON_FILE, 'w', encoding='utf-8') as f:
-        json.dump(all_updates_found, f, ensure_ascii=False, indent=2)
+    save_json_file(OUTPUT_JSON_FILE, all_updates_found)
     
     try:
-        with open(TRACKING_FILE, 'w', encoding='utf-8') as f:
-            json.dump(new_tracker_data_for_save, f, ensure_ascii=False, indent=2)
+        save_json_file(TRACKING_FILE, new_tracker_data_for_save)
         logging.info(f"فایل ردیاب {TRACKING_FILE} با موفقیت بروزرسانی شد.")
     except Exception as e:
         logging.error(f"خطا در ذخیره فایل ردیاب {TRACKING_FILE}: {e}")
 
     num_updates = len(all_updates_found)
-    if os.getenv('GITHUB_OUTPUT'): 
-        with open(GITHUB_OUTPUT_FILE, 'a', encoding='utf-8') as gh_output:
-            gh_output.write(f"updates_count={num_updates}\n")
+    write_github_output(num_updates)
     logging.info(f"\nخلاصه: {num_updates} آپدیت پیدا شد. جزئیات در {OUTPUT_JSON_FILE}")
 
 if __name__ == "__main__":